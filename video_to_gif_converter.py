@@ -8,36 +8,188 @@ GIF Converter
 依赖安装:
 pip install customtkinter
 pip install opencv-python
-pip install Pillow
 """
 
 import os
 import sys
 import re
+import asyncio
 import subprocess
+import shutil
 import threading
+import time
+import queue
+import collections
+import functools
+import tempfile
 import customtkinter as ctk
-from tkinter import filedialog, messagebox, Canvas
+from tkinter import filedialog, messagebox, Canvas, PhotoImage, StringVar
 from pathlib import Path
 
 # 尝试导入视频播放器依赖
 try:
     import cv2
-    from PIL import Image, ImageTk
+    import numpy as np
     VIDEO_PLAYER_AVAILABLE = True
 except ImportError:
     VIDEO_PLAYER_AVAILABLE = False
     print("=" * 60)
-    print("⚠️  警告: opencv-python 或 Pillow 未安装")
+    print("⚠️  警告: opencv-python 未安装")
     print("=" * 60)
     print("视频预览功能将不可用。")
     print("请运行以下命令安装:")
-    print("    pip install opencv-python Pillow")
+    print("    pip install opencv-python")
     print("=" * 60)
 
 
+# FFmpeg 管道 StreamReader 的缓冲上限（Windows 默认管道缓冲只有 4 KB，加大以减少 read 系统调用）
+PIPE_BUFSIZE = 1 << 20
+
+# 每次从管道读取的块大小，按块读取后再自行切分行
+PIPE_CHUNK = 1 << 16
+
+# Windows 下启动 FFmpeg 不弹出控制台窗口
+_CREATIONFLAGS = subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+
+# 启动 FFmpeg/ffprobe 子进程的公共参数
+_POPEN_KW = dict(
+    creationflags=_CREATIONFLAGS,
+    stdin=subprocess.PIPE,
+    stdout=subprocess.PIPE,
+    stderr=subprocess.PIPE
+)
+
+
+@functools.lru_cache(maxsize=4096)
+def _format_time(seconds):
+    """格式化整数秒为 MM:SS（按秒缓存结果）"""
+    mins, secs = divmod(seconds, 60)
+    return f"{mins:02d}:{secs:02d}"
+
+
+def _app_base_path():
+    """获取程序运行的根目录"""
+    if getattr(sys, 'frozen', False):
+        return os.path.dirname(sys.executable)
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+@functools.lru_cache(maxsize=1)
+def _probe_ffmpeg():
+    """查找 FFmpeg（进程内只探测一次）
+    
+    Returns:
+        tuple: (路径或命令名, 版本信息)；同级目录的 ffmpeg.exe 不启动进程探测，版本为 None；
+               未找到时返回 (None, None)
+    """
+    # 1. 首先检查程序同级目录
+    local_ffmpeg = os.path.join(_app_base_path(), "ffmpeg.exe")
+    if os.path.exists(local_ffmpeg):
+        return local_ffmpeg, None
+    
+    # 2. 尝试使用系统 PATH 中的 ffmpeg
+    # Windows 下使用 CREATE_NO_WINDOW | DETACHED_PROCESS，不分配控制台窗口
+    creationflags = (
+        subprocess.CREATE_NO_WINDOW | subprocess.DETACHED_PROCESS if os.name == 'nt' else 0
+    )
+    try:
+        result = subprocess.run(
+            ["ffmpeg", "-version"],
+            capture_output=True,
+            text=True,
+            timeout=3,
+            creationflags=creationflags
+        )
+        if result.returncode == 0:
+            version = result.stdout.splitlines()[0] if result.stdout else ""
+            return "ffmpeg", version
+    except (FileNotFoundError, subprocess.TimeoutExpired):
+        pass
+    
+    return None, None
+
+
+def _stats_period_args(version):
+    """返回缩短 -progress 输出间隔的参数（-stats_period 需要 FFmpeg 4.4 及以上）
+    
+    Args:
+        version: _probe_ffmpeg 返回的版本信息；None 表示同级目录随附的 ffmpeg.exe（4.4.1）
+    
+    Returns:
+        list: 支持时为 ["-stats_period", "0.5"]，否则为空列表（使用默认间隔）
+    """
+    if version is not None:
+        match = re.search(r"version n?(\d+)\.(\d+)", version)
+        # 无法解析的版本号（如 git 快照 N-xxxxx）视为新版
+        if match and (int(match.group(1)), int(match.group(2))) < (4, 4):
+            return []
+    return ["-stats_period", "0.5"]
+
+
+@functools.lru_cache(maxsize=1)
+def _probe_ffprobe():
+    """查找与 FFmpeg 配套的 ffprobe（进程内只探测一次）
+    
+    Returns:
+        str: ffprobe 的路径，未找到时返回 None
+    """
+    local_ffprobe = os.path.join(_app_base_path(), "ffprobe.exe")
+    if os.path.exists(local_ffprobe):
+        return local_ffprobe
+    return shutil.which("ffprobe")
+
+
+@functools.lru_cache(maxsize=None)
+def _probe_cuda_scale(ffmpeg_path):
+    """检测 CUDA 硬件解码 + scale_cuda 缩放是否真正可用（每个 FFmpeg 只探测一次）
+    
+    `-hwaccels` 只说明编译时支持，需再实际初始化设备并跑一次 scale_cuda 才能确认有可用的 GPU
+    
+    Args:
+        ffmpeg_path: FFmpeg 路径或命令名
+    
+    Returns:
+        bool: 可以使用 CUDA 缩放时返回 True
+    """
+    try:
+        result = subprocess.run(
+            [ffmpeg_path, "-hide_banner", "-hwaccels"],
+            capture_output=True,
+            text=True,
+            timeout=3,
+            creationflags=_CREATIONFLAGS
+        )
+        if "cuda" not in result.stdout.split():
+            return False
+        
+        result = subprocess.run(
+            [
+                ffmpeg_path, "-hide_banner", "-loglevel", "error",
+                "-init_hw_device", "cuda=gpu", "-filter_hw_device", "gpu",
+                "-f", "lavfi", "-i", "color=black:s=64x64:d=0.1",
+                "-vf", "format=nv12,hwupload,scale_cuda=32:32,hwdownload,format=nv12",
+                "-f", "null", "-"
+            ],
+            capture_output=True,
+            timeout=10,
+            creationflags=_CREATIONFLAGS
+        )
+        return result.returncode == 0
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+
+
 class VideoPreviewPlayer:
-    """自定义视频播放器 - 使用 OpenCV 和 PIL"""
+    """自定义视频播放器 - 使用 OpenCV 解码，直接写入 Tk PhotoImage"""
+    
+    # 向前跳转不超过此帧数时顺序 grab，而不是重新定位到关键帧
+    GRAB_AHEAD_LIMIT = 48
+    
+    # 拖动预览用的缩略图数量
+    THUMB_COUNT = 200
+    
+    # 连续这么多帧赶不上进度时丢弃一帧
+    LATE_FRAMES_BEFORE_DROP = 3
     
     def __init__(self, canvas, width=800, height=400):
         """初始化视频播放器
@@ -57,14 +209,44 @@ class VideoPreviewPlayer:
         self.fps = 30
         self.total_frames = 0
         self.duration = 0
+        self.frame_width = 0
+        self.frame_height = 0
         
         # 播放控制
         self.is_playing = False
         self.current_frame = 0
         self.update_job = None
-        
-        # 用于保持图像引用
-        self.current_photo = None
+        self._last_frame_idx = -1  # 最近一次解码的帧号（-1 为刚打开，None 为位置未知）
+        self._shown_idx = -1  # 当前显示的帧号
+        
+        # 快速模式（拖动进度条时）使用 INTER_LINEAR，静止画面使用画质更好的 INTER_AREA
+        self.fast_mode = False
+        self._buffers = None  # 解码/跳转共用的转换缓冲区（见 _alloc_buffers）
+        
+        # 后台解码线程：解码 + 缩放后放入有界队列，Tk 线程只负责显示
+        self._frame_queue = queue.Queue(maxsize=2)
+        self._decoder_thread = None
+        self._decoder_stop = threading.Event()
+        
+        # 播放时钟：以 perf_counter 为基准计算每帧的目标显示时间
+        self._t0 = 0.0
+        self._f0 = 0
+        self._late_count = 0
+        self._drop_requests = 0  # Tk 线程请求丢帧的次数
+        self._drops_done = 0  # 解码线程已丢弃的帧数
+        
+        # 拖动预览缩略图缓存：(N, H*3/2, W) 的 I420 平面数组，后台线程逐步填充
+        # （平面布局每像素 1.5 字节，只有 RGB 的一半，拖动时更容易留在缓存中）
+        self._thumb_cache = None
+        self._thumb_rgb = None  # 缩略图显示用的 RGB 缓冲（仅 Tk 线程使用）
+        self._thumb_step = 1
+        self._thumb_ready = 0  # 已填充的缩略图数量
+        self._thumb_gen = 0  # 每次加载视频递增，用于终止旧的提取线程
+        
+        # 复用同一个 PhotoImage 和 Canvas 图像项，每帧只替换像素数据
+        self._photo = PhotoImage(master=self.canvas)
+        self._image_id = self.canvas.create_image(0, 0, anchor='nw', image=self._photo)
+        self._image_pos = (0, 0)  # 图像项当前坐标，未变化时不再调用 coords
     
     def load(self, video_path):
         """加载视频文件
@@ -73,15 +255,25 @@ class VideoPreviewPlayer:
             video_path: 视频文件路径
         """
         # 释放之前的视频
+        self.pause()
         if self.cap is not None:
             self.cap.release()
         
         self.video_path = video_path
-        self.cap = cv2.VideoCapture(video_path)
+        self.cap = self._open_capture(video_path)
         
         if not self.cap.isOpened():
             raise Exception(f"无法打开视频文件: {video_path}")
         
+        self.frame_width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.frame_height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        
+        # 按显示尺寸预分配转换缓冲区，逐帧复用
+        if self.frame_width > 0 and self.frame_height > 0:
+            self._buffers = self._alloc_buffers(*self._fit_size(self.frame_width, self.frame_height))
+        else:
+            self._buffers = None
+        
         # 获取视频信息
         self.fps = self.cap.get(cv2.CAP_PROP_FPS)
         if self.fps <= 0:
@@ -92,17 +284,60 @@ class VideoPreviewPlayer:
         
         # 重置状态
         self.current_frame = 0
+        self._last_frame_idx = -1
+        self._shown_idx = -1
         self.is_playing = False
         
         # 显示第一帧
         self.seek(0)
     
+    def _open_capture(self, video_path):
+        """打开视频，优先使用 FFmpeg 后端的硬件解码
+        
+        Args:
+            video_path: 视频文件路径
+            
+        Returns:
+            cv2.VideoCapture
+        """
+        cap = None
+        
+        # OpenCV 4.5.2+ 支持在打开时请求硬件解码（D3D11/VAAPI/MFX 等），不可用时自动回退
+        if hasattr(cv2, 'CAP_PROP_HW_ACCELERATION'):
+            cap = cv2.VideoCapture(
+                video_path,
+                cv2.CAP_FFMPEG,
+                [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+            )
+            if not cap.isOpened():
+                cap.release()
+                cap = None
+        
+        if cap is None:
+            cap = cv2.VideoCapture(video_path)
+        return cap
+    
     def play(self):
         """开始/继续播放"""
-        if not self.cap or not self.cap.isOpened():
+        if not self.cap or not self.cap.isOpened() or self.is_playing:
             return
         
+        # 暂停时丢弃了已解码但未显示的帧（或读取失败后位置未知），从当前显示帧之后继续解码
+        if self._last_frame_idx is None or (
+                self._shown_idx >= 0 and self._last_frame_idx != self._shown_idx):
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, self._shown_idx + 1)
+            self._last_frame_idx = self._shown_idx
+        
         self.is_playing = True
+        self._t0 = time.perf_counter()
+        self._f0 = self._last_frame_idx + 1
+        self._late_count = 0
+        self._drop_requests = 0
+        self._drops_done = 0
+        self._frame_queue = queue.Queue(maxsize=2)
+        self._decoder_stop.clear()
+        self._decoder_thread = threading.Thread(target=self._decoder_loop, daemon=True)
+        self._decoder_thread.start()
         self._update_frame()
     
     def pause(self):
@@ -111,6 +346,15 @@ class VideoPreviewPlayer:
         if self.update_job:
             self.canvas.after_cancel(self.update_job)
             self.update_job = None
+        self._stop_decoder()
+    
+    def _stop_decoder(self):
+        """停止后台解码线程（内部方法）"""
+        if self._decoder_thread is None:
+            return
+        self._decoder_stop.set()
+        self._decoder_thread.join()
+        self._decoder_thread = None
     
     def stop(self):
         """停止播放（暂停的别名，用于兼容）"""
@@ -127,15 +371,37 @@ class VideoPreviewPlayer:
         
         # 限制范围
         frame_number = max(0, min(frame_number, self.total_frames - 1))
-        
-        # 设置位置
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
         self.current_frame = frame_number
         
-        # 读取并显示该帧
-        ret, frame = self.cap.read()
+        # 上次读取失败后解码器可能停在文件末尾，位置未知时必须重新定位
+        if self._last_frame_idx is None:
+            delta = 0
+        else:
+            delta = frame_number - self._last_frame_idx
+        if 0 < delta <= self.GRAB_AHEAD_LIMIT:
+            # 小幅前进：顺序跳过中间帧，不触发解复用器重新定位
+            for _ in range(delta - 1):
+                if not self.cap.grab():
+                    break
+            ret, frame = self.cap.read()
+        else:
+            # 设置位置（FFmpeg 会先定位到关键帧，再解码到目标帧）
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+            ret, frame = self.cap.read()
+            
+            # 某些长 GOP 文件定位不准，偏差超过半个 GOP 时再定位一次
+            landed = int(self.cap.get(cv2.CAP_PROP_POS_FRAMES)) - 1
+            if ret and abs(landed - frame_number) > self.GRAB_AHEAD_LIMIT // 2:
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+                ret, frame = self.cap.read()
+        
+        # 显示该帧
         if ret:
+            self._last_frame_idx = frame_number
+            self._shown_idx = frame_number
             self._display_frame(frame)
+        else:
+            self._last_frame_idx = None
     
     def seek_to_time(self, seconds):
         """跳转到指定时间
@@ -156,74 +422,311 @@ class VideoPreviewPlayer:
             return self.current_frame / self.fps
         return 0
     
+    def _decoder_loop(self):
+        """解码循环（后台线程）：读取帧、缩放并转换为 RGB 后放入队列"""
+        frame_idx = self._last_frame_idx
+        
+        while not self._decoder_stop.is_set():
+            # 显示端落后时只 grab 不 retrieve，跳过该帧的输出转换和缩放
+            if self._drops_done < self._drop_requests:
+                self._drops_done += 1
+                if self.cap.grab():
+                    frame_idx += 1
+                    self._last_frame_idx = frame_idx
+                    continue
+            
+            ret, frame = self.cap.read()
+            if not ret:
+                item = None  # 结束标记
+            else:
+                frame_idx += 1
+                self._last_frame_idx = frame_idx
+                # 在解码线程中生成 PPM 数据（拷贝），输出缓冲可以立即复用
+                frame_rgb = self._convert_frame(frame, self._buffers, cv2.INTER_LINEAR)
+                item = (frame_idx, self._to_ppm(frame_rgb), frame_rgb.shape[1], frame_rgb.shape[0])
+            
+            # 队列满时等待显示端取走，同时响应停止请求
+            while not self._decoder_stop.is_set():
+                try:
+                    self._frame_queue.put(item, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            
+            if item is None:
+                return
+    
     def _update_frame(self):
-        """更新帧（内部方法）"""
-        if not self.is_playing or not self.cap or not self.cap.isOpened():
+        """显示队列中的下一帧（内部方法，在 Tk 线程中运行）"""
+        if not self.is_playing:
             return
         
-        ret, frame = self.cap.read()
+        try:
+            item = self._frame_queue.get_nowait()
+        except queue.Empty:
+            # 解码还没跟上，稍后再取
+            self.update_job = self.canvas.after(5, self._update_frame)
+            return
         
-        if ret:
-            self._display_frame(frame)
-            self.current_frame += 1
-            
-            # 检查是否到达结尾
-            if self.current_frame >= self.total_frames:
-                self.is_playing = False
-                return
-            
-            # 计算下一帧的延迟
-            delay = int(1000 / self.fps)
-            self.update_job = self.canvas.after(delay, self._update_frame)
-        else:
-            # 读取失败，停止播放
+        if item is None:
+            # 读取失败或到达结尾，停止播放
             self.is_playing = False
+            self.update_job = None
+            self._stop_decoder()
+            return
+        
+        frame_idx, ppm, new_w, new_h = item
+        self._shown_idx = frame_idx
+        self._blit_ppm(ppm, new_w, new_h)
+        self.current_frame = frame_idx + 1
+        
+        # 检查是否到达结尾
+        if self.current_frame >= self.total_frames:
+            self.is_playing = False
+            self.update_job = None
+            self._stop_decoder()
+            return
+        
+        # 按播放时钟计算下一帧的延迟，避免整数毫秒取整造成的累积漂移
+        target = self._t0 + (frame_idx - self._f0 + 1) / self.fps
+        delay = int((target - time.perf_counter()) * 1000)
+        if delay <= 1:
+            delay = 1
+            self._late_count += 1
+            if self._late_count >= self.LATE_FRAMES_BEFORE_DROP:
+                self._late_count = 0
+                self._drop_requests += 1
+        else:
+            self._late_count = 0
+        self.update_job = self.canvas.after(delay, self._update_frame)
     
-    def _display_frame(self, frame):
-        """显示帧到 Canvas
+    def _fit_size(self, w, h):
+        """计算适应显示区域的尺寸（保持宽高比，取偶数以便 YUV420 色度减半）
         
         Args:
-            frame: OpenCV 读取的帧 (BGR 格式)
+            w: 原始宽度
+            h: 原始高度
+            
+        Returns:
+            (new_w, new_h)
         """
-        # BGR -> RGB
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        scale = min(self.display_width / w, self.display_height / h)
+        new_w = max(2, int(w * scale) & ~1)
+        new_h = max(2, int(h * scale) & ~1)
+        return new_w, new_h
+    
+    def _alloc_buffers(self, new_w, new_h):
+        """按显示尺寸分配帧转换用的缓冲区
         
-        # 获取原始尺寸
-        h, w = frame_rgb.shape[:2]
+        Args:
+            new_w: 显示宽度
+            new_h: 显示高度
+            
+        Returns:
+            dict: rgb（RGB 输出）、resized（BGR 缩放结果）、i420（缩放后的 I420）
+        """
+        return {
+            'rgb': np.empty((new_h, new_w, 3), dtype=np.uint8),
+            'resized': np.empty((new_h, new_w, 3), dtype=np.uint8),
+            'i420': np.empty((new_h * 3 // 2, new_w), dtype=np.uint8),
+        }
+    
+    def _frame_buffers(self, frame, buffers):
+        """返回与该帧显示尺寸匹配的缓冲区（不匹配时重新分配）"""
+        h, w = frame.shape[:2]
+        new_w, new_h = self._fit_size(w, h)
+        
+        if buffers is None or buffers['rgb'].shape[:2] != (new_h, new_w):
+            buffers = self._alloc_buffers(new_w, new_h)
+        return buffers
+    
+    def _convert_frame(self, frame, buffers=None, interpolation=None):
+        """将解码帧缩放到显示尺寸并转换为 RGB
+        
+        先缩小再做颜色转换，避免生成全分辨率的中间 RGB 帧。
         
-        # 计算缩放比例以适应显示区域（保持宽高比）
-        scale_w = self.display_width / w
-        scale_h = self.display_height / h
-        scale = min(scale_w, scale_h)
+        Args:
+            frame: OpenCV 读取的帧（BGR 或灰度）
+            buffers: 可选的预分配缓冲区（仅在当前线程独占使用时传入）
+            interpolation: 缩放插值方式，默认 INTER_AREA
+            
+        Returns:
+            缩放后的 RGB 帧 (ndarray, uint8)
+        """
+        if interpolation is None:
+            interpolation = cv2.INTER_AREA
+        buffers = self._frame_buffers(frame, buffers)
+        new_h, new_w = buffers['rgb'].shape[:2]
+        
+        if frame.ndim == 2:
+            # 灰度帧（少见），不使用预分配缓冲
+            frame_resized = cv2.resize(frame, (new_w, new_h), interpolation=interpolation)
+            return cv2.cvtColor(frame_resized, cv2.COLOR_GRAY2RGB)
+        
+        cv2.resize(frame, (new_w, new_h), dst=buffers['resized'], interpolation=interpolation)
+        return cv2.cvtColor(buffers['resized'], cv2.COLOR_BGR2RGB, dst=buffers['rgb'])
+    
+    def _convert_frame_i420(self, frame, buffers=None, interpolation=None):
+        """将解码帧缩放到显示尺寸，输出 I420 平面格式（每像素 1.5 字节）
+        
+        Args:
+            frame: OpenCV 读取的帧（BGR 或灰度）
+            buffers: 可选的预分配缓冲区（仅在当前线程独占使用时传入）
+            interpolation: 缩放插值方式，默认 INTER_AREA
+            
+        Returns:
+            缩放后的 I420 帧 (ndarray, uint8, 形状为 (h*3/2, w))
+        """
+        if interpolation is None:
+            interpolation = cv2.INTER_AREA
+        buffers = self._frame_buffers(frame, buffers)
+        new_h, new_w = buffers['rgb'].shape[:2]
         
-        new_w = int(w * scale)
-        new_h = int(h * scale)
+        if frame.ndim == 2:
+            frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
         
-        # 调整大小
-        frame_resized = cv2.resize(frame_rgb, (new_w, new_h), interpolation=cv2.INTER_AREA)
+        cv2.resize(frame, (new_w, new_h), dst=buffers['resized'], interpolation=interpolation)
+        return cv2.cvtColor(buffers['resized'], cv2.COLOR_BGR2YUV_I420, dst=buffers['i420'])
+    
+    def _display_frame(self, frame):
+        """显示帧到 Canvas
         
-        # 转换为 PIL Image
-        image = Image.fromarray(frame_resized)
+        Args:
+            frame: OpenCV 读取的帧
+        """
+        interpolation = cv2.INTER_LINEAR if self.fast_mode else cv2.INTER_AREA
+        self._blit(self._convert_frame(frame, self._buffers, interpolation))
+    
+    @staticmethod
+    def _to_ppm(frame_rgb):
+        """把 RGB 帧打包为 PPM (P6) 数据"""
+        new_h, new_w = frame_rgb.shape[:2]
+        return b"P6\n%d %d\n255\n" % (new_w, new_h) + frame_rgb.tobytes()
+    
+    def _blit(self, frame_rgb):
+        """把已缩放的 RGB 帧写入 PhotoImage 并居中
         
-        # 转换为 ImageTk
-        photo = ImageTk.PhotoImage(image=image)
+        Args:
+            frame_rgb: 显示尺寸的 RGB 帧 (ndarray, uint8)
+        """
+        self._blit_ppm(self._to_ppm(frame_rgb), frame_rgb.shape[1], frame_rgb.shape[0])
+    
+    def _blit_ppm(self, ppm, new_w, new_h):
+        """把 PPM 数据写入 PhotoImage 并居中
         
-        # 清空 Canvas
-        self.canvas.delete("all")
+        Args:
+            ppm: PPM (P6) 数据
+            new_w: 图像宽度
+            new_h: 图像高度
+        """
+        # 以 PPM 数据直接更新 PhotoImage，不经过 PIL
+        self._photo.configure(data=ppm)
         
         # 居中显示
         x = (self.display_width - new_w) // 2
         y = (self.display_height - new_h) // 2
+        if (x, y) != self._image_pos:
+            self._image_pos = (x, y)
+            self.canvas.coords(self._image_id, x, y)
+    
+    def start_thumbnail_cache(self):
+        """在后台线程中预先提取均匀分布的缩略图，供拖动进度条时直接显示"""
+        self._thumb_gen += 1
+        self._thumb_cache = None
+        self._thumb_ready = 0
         
-        # 在 Canvas 上显示
-        self.canvas.create_image(x, y, anchor='nw', image=photo)
+        if not self.video_path or self.total_frames <= 0:
+            return
         
-        # 保持引用，防止被垃圾回收
-        self.current_photo = photo
+        count = min(self.THUMB_COUNT, self.total_frames)
+        self._thumb_step = max(1, self.total_frames // count)
+        
+        thread = threading.Thread(
+            target=self._thumbnail_loop,
+            args=(self._thumb_gen, self.video_path, count, self._thumb_step),
+            daemon=True
+        )
+        thread.start()
+    
+    def _thumbnail_loop(self, gen, video_path, count, step):
+        """缩略图提取循环（后台线程，使用独立的 VideoCapture）"""
+        cap = self._open_capture(video_path)
+        if not cap.isOpened():
+            return
+        
+        try:
+            cache = None
+            frame_idx = 0
+            buffers = None
+            if self.frame_width > 0 and self.frame_height > 0:
+                buffers = self._alloc_buffers(*self._fit_size(self.frame_width, self.frame_height))
+            
+            for i in range(count):
+                target = i * step
+                
+                # 间隔较大时直接定位到目标帧，否则顺序 grab，只对需要的帧做 retrieve
+                if target - frame_idx > self.GRAB_AHEAD_LIMIT:
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+                    frame_idx = target
+                while frame_idx < target:
+                    if gen != self._thumb_gen:
+                        return
+                    if not cap.grab():
+                        return
+                    frame_idx += 1
+                if not cap.grab():
+                    return
+                frame_idx += 1
+                ret, frame = cap.retrieve()
+                
+                # 已加载了新视频或已被终止，放弃本次提取
+                if gen != self._thumb_gen:
+                    return
+                if not ret:
+                    return
+                
+                thumb = self._convert_frame_i420(frame, buffers)
+                if cache is None:
+                    cache = np.empty((count,) + thumb.shape, dtype=np.uint8)
+                    self._thumb_cache = cache
+                cache[i] = thumb
+                self._thumb_ready = i + 1
+        finally:
+            cap.release()
+    
+    def show_thumbnail(self, fraction):
+        """显示最接近指定位置的缩略图
+        
+        Args:
+            fraction: 进度位置 (0~1)
+            
+        Returns:
+            bool: 缩略图已就绪并显示返回 True，否则返回 False（需要实际 seek）
+        """
+        cache = self._thumb_cache
+        if cache is None:
+            return False
+        
+        idx = min(int(fraction * len(cache)), len(cache) - 1)
+        if idx >= self._thumb_ready:
+            return False
+        
+        thumb = cache[idx]
+        new_h, new_w = thumb.shape[0] * 2 // 3, thumb.shape[1]
+        if self._thumb_rgb is None or self._thumb_rgb.shape[:2] != (new_h, new_w):
+            self._thumb_rgb = np.empty((new_h, new_w, 3), dtype=np.uint8)
+        
+        self._blit(cv2.cvtColor(thumb, cv2.COLOR_YUV2RGB_I420, dst=self._thumb_rgb))
+        return True
+    
+    def stop_thumbnail_cache(self):
+        """终止后台缩略图提取（已提取的缩略图仍可使用）"""
+        self._thumb_gen += 1
     
     def release(self):
         """释放资源"""
         self.pause()
+        self.stop_thumbnail_cache()
         if self.cap:
             self.cap.release()
             self.cap = None
@@ -233,6 +736,12 @@ class VideoPreviewPlayer:
 class ModernGifConverter:
     """现代化 GIF 转换器主类"""
     
+    # 解析 `ffmpeg -i` 输出中的视频时长
+    _DURATION_RE = re.compile(r"Duration:\s*(\d{2}):(\d{2}):(\d{2}\.\d{2})")
+    
+    # 有效时长达到此秒数的 GIF 改为两遍转换（先生成调色板文件，再应用），避免 split 缓冲整段视频
+    TWO_PASS_MIN_DURATION = 30
+    
     def __init__(self, root):
         """初始化应用程序"""
         self.root = root
@@ -258,18 +767,39 @@ class ModernGifConverter:
         self.input_file = None
         self.output_file = None
         self.total_duration = 0
+        self.video_info = {}  # ffprobe 得到的首个视频流信息（width/height/fps），用于精简滤镜
+        self._total_duration_str = "00:00"  # 总时长的显示文本，时长变化时更新
         self.is_playing = False
         self.video_player = None
         self.is_seeking = False  # 拖动进度条标志
+        self._drag_pending = None  # 待执行的拖动刷新任务
+        self._drag_value = 0  # 最近一次拖动的滑块值
         self.was_playing_before_seek = False  # 拖动前的播放状态
         self.pause_position = 0  # 暂停时的位置
         self.output_format = "GIF"  # 输出格式：GIF 或 WebP
+        self.max_log_lines = 500  # 文本框最多保留的日志行数
+        # 待写入文本框的日志；超出 max_log_lines 的旧行反正会被裁掉，直接丢弃
+        self._log_queue = collections.deque(maxlen=self.max_log_lines)
+        self._conversion_progress = 0  # 转换协程写入的最新进度（%），由定时器读取
+        self._shown_progress = 0  # 进度条当前显示的进度（%）
+        self.ffmpeg_threads = str(os.cpu_count() or 2)  # FFmpeg 编码/滤镜线程数
+        
+        # 所有 FFmpeg 子进程共用一个 asyncio 事件循环线程读取管道
+        self._aio_loop = asyncio.new_event_loop()
+        threading.Thread(target=self._aio_loop.run_forever, daemon=True).start()
+        
+        # 进度和时间文本通过 StringVar 更新，不必每次 configure 标签
+        self._progress_var = StringVar(master=self.root, value="0%")
+        self._time_var = StringVar(master=self.root, value="00:00 / 00:00")
         
         # 创建 GUI
         self.create_widgets()
+        self._drain_updates()
         
         # 检测 FFmpeg（在 GUI 创建后）
         self.ffmpeg_path = self.detect_ffmpeg()
+        self.ffprobe_path = _probe_ffprobe()  # 用于快速获取时长，可选
+        self._stats_args = _stats_period_args(_probe_ffmpeg()[1])
         
         # 启动视频进度更新循环
         if VIDEO_PLAYER_AVAILABLE:
@@ -285,39 +815,21 @@ class ModernGifConverter:
         Returns:
             str: FFmpeg 的完整路径或命令名，如果未找到则返回 None
         """
-        # 获取程序运行的根目录
-        if getattr(sys, 'frozen', False):
-            base_path = os.path.dirname(sys.executable)
-        else:
-            base_path = os.path.dirname(os.path.abspath(__file__))
+        ffmpeg_path, version = _probe_ffmpeg()
         
-        # 1. 首先检查程序同级目录
-        local_ffmpeg = os.path.join(base_path, "ffmpeg.exe")
-        if os.path.exists(local_ffmpeg):
+        if ffmpeg_path:
             if hasattr(self, 'log_text'):
-                self.log(f"✓ 找到 FFmpeg: {local_ffmpeg}")
-            return local_ffmpeg
-        
-        # 2. 尝试使用系统 PATH 中的 ffmpeg
-        try:
-            result = subprocess.run(
-                ["ffmpeg", "-version"],
-                capture_output=True,
-                text=True,
-                timeout=3
-            )
-            if result.returncode == 0:
-                if hasattr(self, 'log_text'):
+                if version is None:
+                    self.log(f"✓ 找到 FFmpeg: {ffmpeg_path}")
+                else:
                     self.log("✓ 使用系统 PATH 中的 FFmpeg")
-                return "ffmpeg"
-        except (FileNotFoundError, subprocess.TimeoutExpired):
-            pass
+            return ffmpeg_path
         
-        # 3. 都找不到，显示错误提示
+        # 都找不到，显示错误提示
         error_msg = (
             f"未找到 ffmpeg.exe！\n\n"
             f"请确保 ffmpeg.exe 与本软件放在同一个文件夹内：\n"
-            f"{base_path}\n\n"
+            f"{_app_base_path()}\n\n"
             f"或者在系统中安装 FFmpeg 并添加到 PATH 环境变量。"
         )
         messagebox.showerror("FFmpeg 未找到", error_msg)
@@ -481,7 +993,7 @@ class ModernGifConverter:
             
             self.time_label = ctk.CTkLabel(
                 left_controls,
-                text="00:00 / 00:00",
+                textvariable=self._time_var,
                 font=ctk.CTkFont(family="Consolas", size=13, weight="bold"),
                 text_color=("#1f6aa5", "#4a9eff")
             )
@@ -653,7 +1165,7 @@ class ModernGifConverter:
         
         self.conversion_progress_label = ctk.CTkLabel(
             progress_inner,
-            text="0%",
+            textvariable=self._progress_var,
             font=ctk.CTkFont(size=12, weight="bold"),  # 减小字体
             text_color=("#1f6aa5", "#4a9eff")
         )
@@ -683,9 +1195,6 @@ class ModernGifConverter:
             activate_scrollbars=True
         )
         self.log_text.pack(fill="both", expand=True)
-        
-        self.log_line_count = 0
-        self.max_log_lines = 500
     
     def select_file(self):
         """选择视频文件"""
@@ -717,13 +1226,20 @@ class ModernGifConverter:
     
     def load_video_preview(self, video_path):
         """加载视频到预览器"""
+        # load() 会先停止当前播放，界面的播放状态同步复位
+        self.is_playing = False
+        self.pause_position = 0
+        self.play_btn.configure(text="▶️ 播放")
+        
         try:
             self.video_player.load(video_path)
+            self.video_player.start_thumbnail_cache()
             
             # 从播放器获取视频时长（更准确）
             if self.video_player.duration > 0:
                 self.total_duration = self.video_player.duration
-                self.log(f"✓ 视频已加载到预览器 (时长: {self.format_time(self.total_duration)})")
+                self._total_duration_str = self.format_time(self.total_duration)
+                self.log(f"✓ 视频已加载到预览器 (时长: {self._total_duration_str})")
             else:
                 self.log("✓ 视频已加载到预览器")
             
@@ -779,6 +1295,7 @@ class ModernGifConverter:
     def on_slider_press(self, event):
         """开始拖动进度条"""
         self.is_seeking = True
+        self.video_player.fast_mode = True
         # 记录拖动前的播放状态
         self.was_playing_before_seek = self.is_playing
         # 暂停视频（不使用 stop，保持画面）
@@ -791,34 +1308,40 @@ class ModernGifConverter:
             self.is_playing = False
     
     def on_slider_drag(self, event):
-        """拖动进度条中（实时显示时间和预览帧）"""
+        """拖动进度条中（合并高频拖动事件，每个刷新周期最多处理一次）"""
         if self.total_duration > 0 and self.video_player:
-            # 获取当前滑块值
-            slider_value = self.video_progress_slider.get()
-            seek_time = slider_value * self.total_duration
-            
-            # 实时更新时间显示
-            self.time_label.configure(
-                text=f"{self.format_time(seek_time)} / {self.format_time(self.total_duration)}"
-            )
-            
-            # 实时预览帧（每隔一定距离才更新，避免过于频繁）
-            if hasattr(self, '_last_drag_time'):
-                import time
-                current_time = time.time()
-                if current_time - self._last_drag_time < 0.05:  # 50ms 节流
-                    return
-                self._last_drag_time = current_time
-            else:
-                import time
-                self._last_drag_time = time.time()
-            
-            # 跳转到拖动位置显示帧
-            frame_number = int(slider_value * self.video_player.total_frames)
-            self.video_player.seek(frame_number)
+            self._drag_value = self.video_progress_slider.get()
+            if self._drag_pending is None:
+                self._drag_pending = self.root.after(33, self._apply_drag)
+    
+    def _apply_drag(self):
+        """按最新的拖动位置刷新时间显示和预览帧"""
+        self._drag_pending = None
+        slider_value = self._drag_value
+        seek_time = slider_value * self.total_duration
+        
+        # 实时更新时间显示
+        self._time_var.set(f"{self.format_time(seek_time)} / {self._total_duration_str}")
+        
+        # 优先显示预先提取的缩略图，拖动过程中不做实时解码
+        if self.video_player.show_thumbnail(slider_value):
+            return
+        
+        # 缩略图尚未就绪：跳转到拖动位置显示帧
+        frame_number = int(slider_value * self.video_player.total_frames)
+        self.video_player.seek(frame_number)
     
     def on_slider_release(self, event):
         """释放进度条（跳转到拖动位置）"""
+        # 取消尚未执行的拖动刷新，避免缩略图覆盖精确跳转的帧
+        if self._drag_pending is not None:
+            self.root.after_cancel(self._drag_pending)
+            self._drag_pending = None
+        
+        # 最终停留的画面使用高质量缩放
+        if self.video_player:
+            self.video_player.fast_mode = False
+        
         if self.video_player and self.total_duration > 0:
             # 获取目标时间和帧号
             slider_value = self.video_progress_slider.get()
@@ -869,9 +1392,7 @@ class ModernGifConverter:
                             # 更新进度条
                             self.video_progress_slider.set(current / self.total_duration)
                             # 更新时间显示
-                            self.time_label.configure(
-                                text=f"{self.format_time(current)} / {self.format_time(self.total_duration)}"
-                            )
+                            self._time_var.set(f"{self.format_time(current)} / {self._total_duration_str}")
                 except:
                     pass
             self.root.after(100, update)
@@ -883,17 +1404,13 @@ class ModernGifConverter:
         self.play_btn.configure(text="▶️ 播放")
         # 进度条设为 100%
         self.video_progress_slider.set(1.0)
-        self.time_label.configure(
-            text=f"{self.format_time(self.total_duration)} / {self.format_time(self.total_duration)}"
-        )
+        self._time_var.set(f"{self._total_duration_str} / {self._total_duration_str}")
     
     def format_time(self, seconds):
         """格式化时间为 MM:SS"""
         if seconds is None:
             return "00:00"
-        mins = int(seconds // 60)
-        secs = int(seconds % 60)
-        return f"{mins:02d}:{secs:02d}"
+        return _format_time(int(seconds))
     
     def set_start_point(self):
         """设置起点（当前播放位置）"""
@@ -943,73 +1460,118 @@ class ModernGifConverter:
             self.log(f"✓ 已选择输出格式: {value}")
     
     def log(self, message):
-        """添加日志消息"""
-        self.log_text.insert("end", message + "\n")
-        self.log_line_count += 1
-        
-        # 限制日志行数
-        if self.log_line_count > self.max_log_lines:
-            self.log_text.delete("1.0", "101.0")
-            self.log_line_count -= 100
-        
-        self.log_text.see("end")
-        self.root.update_idletasks()
+        """添加日志消息（可在任意线程调用，由 _drain_updates 批量写入文本框）"""
+        self._log_queue.append(message)
     
-    def log_line(self, line):
-        """添加单行日志（FFmpeg 输出）"""
-        if not line.strip():
-            return
-        
-        self.log_text.insert("end", line + "\n")
-        self.log_line_count += 1
-        
-        if self.log_line_count > self.max_log_lines:
-            self.log_text.delete("1.0", "101.0")
-            self.log_line_count -= 100
+    def log_lines(self, text):
+        """添加一块多行日志（FFmpeg 输出），跳过空行"""
+        self._log_queue.extend(
+            line for line in map(str.strip, text.splitlines()) if line
+        )
+    
+    def _drain_updates(self):
+        """定时把累积的日志一次性写入文本框，并刷新转换进度（Tk 线程）"""
+        progress = self._conversion_progress
+        if progress != self._shown_progress:
+            self.update_conversion_progress(progress)
+        
+        if self._log_queue:
+            lines = []
+            while self._log_queue:
+                lines.append(self._log_queue.popleft())
+            
+            # 用户向上翻看日志时不自动滚动，只有停在底部时才跟随
+            at_bottom = self.log_text.yview()[1] >= 0.999
+            
+            self.log_text.insert("end", "\n".join(lines) + "\n")
+            
+            # 限制日志行数：超出 200 行余量后才一次性删除，避免每次刷新都裁剪
+            line_count = int(self.log_text.index("end-1c").split(".")[0]) - 1
+            if line_count > self.max_log_lines + 200:
+                overflow = line_count - self.max_log_lines
+                self.log_text.delete("1.0", f"{overflow + 1}.0")
+            
+            if at_bottom:
+                self.log_text.see("end")
         
-        self.log_text.see("end")
+        self.root.after(50, self._drain_updates)
     
     def get_video_duration(self, video_path):
-        """获取视频总时长（秒）"""
+        """获取视频总时长（秒）
+        
+        优先使用 ffprobe 直接输出时长，同时记录视频流的宽高和帧率；
+        没有 ffprobe 时解析 `ffmpeg -i` 的输出
+        """
+        self.video_info = {}
+        
         if not self.ffmpeg_path:
             return None
         
         try:
-            cmd = [self.ffmpeg_path, "-i", video_path]
-            
-            if os.name == 'nt':
-                creationflags = subprocess.CREATE_NO_WINDOW
-            else:
-                creationflags = 0
+            total_seconds = None
             
-            result = subprocess.run(
-                cmd,
-                stderr=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                text=True,
-                encoding='utf-8',
-                errors='ignore',
-                creationflags=creationflags
-            )
+            if self.ffprobe_path:
+                result = subprocess.run(
+                    [
+                        self.ffprobe_path,
+                        "-v", "error",
+                        "-select_streams", "v:0",
+                        "-show_entries", "format=duration:stream=width,height,r_frame_rate",
+                        "-of", "default=nw=1",
+                        video_path
+                    ],
+                    text=True,
+                    encoding='utf-8',
+                    errors='ignore',
+                    **_POPEN_KW
+                )
+                fields = dict(
+                    line.split("=", 1) for line in result.stdout.splitlines() if "=" in line
+                )
+                try:
+                    total_seconds = float(fields.get("duration", ""))
+                except ValueError:
+                    total_seconds = None  # 部分容器没有 format 时长（N/A）
+                
+                try:
+                    num, _, den = fields["r_frame_rate"].partition("/")
+                    self.video_info = {
+                        "width": int(fields["width"]),
+                        "height": int(fields["height"]),
+                        "fps": int(num) / int(den or 1),
+                    }
+                except (KeyError, ValueError, ZeroDivisionError):
+                    self.video_info = {}
             
-            # 解析时长
-            duration_pattern = r"Duration:\s*(\d{2}):(\d{2}):(\d{2}\.\d{2})"
-            match = re.search(duration_pattern, result.stderr)
+            if total_seconds is None:
+                result = subprocess.run(
+                    [self.ffmpeg_path, "-i", video_path],
+                    text=True,
+                    encoding='utf-8',
+                    errors='ignore',
+                    **_POPEN_KW
+                )
+                
+                # 解析时长（先用子串判断，没有 Duration 时不运行正则）
+                match = "Duration:" in result.stderr and self._DURATION_RE.search(result.stderr)
+                if match:
+                    total_seconds = (
+                        int(match.group(1)) * 3600
+                        + int(match.group(2)) * 60
+                        + float(match.group(3))
+                    )
             
-            if match:
-                hours = int(match.group(1))
-                minutes = int(match.group(2))
-                seconds = float(match.group(3))
+            if total_seconds is not None:
+                hours, rem = divmod(total_seconds, 3600)
+                minutes, seconds = divmod(rem, 60)
                 
-                total_seconds = hours * 3600 + minutes * 60 + seconds
                 self.total_duration = total_seconds
-                self.log(f"⏱️ 视频时长: {hours:02d}:{minutes:02d}:{seconds:05.2f} ({total_seconds:.2f} 秒)")
+                self._total_duration_str = self.format_time(total_seconds)
+                self.log(f"⏱️ 视频时长: {int(hours):02d}:{int(minutes):02d}:{seconds:05.2f} ({total_seconds:.2f} 秒)")
                 
                 # 更新时间显示
                 if VIDEO_PLAYER_AVAILABLE and hasattr(self, 'time_label'):
-                    self.time_label.configure(
-                        text=f"00:00 / {self.format_time(total_seconds)}"
-                    )
+                    self._time_var.set(f"00:00 / {self._total_duration_str}")
                 
                 return total_seconds
             else:
@@ -1034,6 +1596,10 @@ class ModernGifConverter:
         if VIDEO_PLAYER_AVAILABLE and self.is_playing:
             self.toggle_play_pause()
         
+        # 停止后台缩略图提取，避免与 FFmpeg 争抢解码资源
+        if self.video_player:
+            self.video_player.stop_thumbnail_cache()
+        
         # 生成输出文件名（根据格式）
         input_path = Path(self.input_file)
         if self.output_format == "WebP":
@@ -1050,19 +1616,20 @@ class ModernGifConverter:
         self.is_converting = True
         
         # 重置进度
+        self._conversion_progress = 0
+        self._shown_progress = 0
         self.conversion_progress_bar.set(0)
-        self.conversion_progress_label.configure(text="0%")
+        self._progress_var.set("0%")
         
         # 清空日志
+        self._log_queue.clear()
         self.log_text.delete("1.0", "end")
-        self.log_line_count = 0
         
-        # 启动转换线程
-        thread = threading.Thread(target=self.convert_video, daemon=True)
-        thread.start()
+        # 在 asyncio 事件循环中执行转换
+        asyncio.run_coroutine_threadsafe(self.convert_video(), self._aio_loop)
     
-    def convert_video(self):
-        """执行视频转换（后台线程）"""
+    async def convert_video(self):
+        """执行视频转换（asyncio 事件循环中的协程）"""
         try:
             # 获取裁剪参数
             try:
@@ -1116,88 +1683,303 @@ class ModernGifConverter:
                 # WebP 转换参数
                 cmd = [
                     self.ffmpeg_path,
+                    "-hide_banner",
+                    "-loglevel", "warning",
+                    "-filter_threads", self.ffmpeg_threads,
+                    "-filter_complex_threads", self.ffmpeg_threads,
                     "-ss", str(start_seek),
                     "-to", str(end_to),
                     "-i", self.input_file,
                     "-vcodec", "libwebp",
-                    "-filter_complex", "[0:v] fps=10,scale=480:-1:flags=lanczos",
+                    "-filter_complex", f"[0:v] {self._scale_chain(10, 480)}",
                     "-compression_level", "6",
                     "-q:v", "25",
                     "-loop", "0",
                     "-preset", "drawing",
                     "-an",
+                    "-threads", self.ffmpeg_threads,
+                    "-progress", "pipe:1",
+                    "-nostats",
+                    *self._stats_args,
                     "-y",
                     self.output_file
                 ]
+                returncode = await self._run_ffmpeg(cmd, effective_duration)
             else:
-                # GIF 转换参数（原有逻辑）
-                cmd = [
-                    self.ffmpeg_path,
-                    "-ss", str(start_seek),
-                    "-to", str(end_to),
-                    "-i", self.input_file,
-                    "-vf", "fps=8,scale=240:-1:flags=lanczos,split[s0][s1];[s0]palettegen=max_colors=16[p];[s1][p]paletteuse=dither=bayer:bayer_scale=3",
-                    "-y",
-                    self.output_file
-                ]
-            
-            if os.name == 'nt':
-                creationflags = subprocess.CREATE_NO_WINDOW
-            else:
-                creationflags = 0
-            
-            process = subprocess.Popen(
-                cmd,
-                stderr=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stdin=subprocess.PIPE,
-                universal_newlines=True,
-                bufsize=1,
-                encoding='utf-8',
-                errors='ignore',
-                creationflags=creationflags
-            )
-            
-            time_pattern = r"time=(\d{2}):(\d{2}):(\d{2}\.\d{2})"
-            last_progress = -1
-            
-            for line in process.stderr:
-                line = line.strip()
+                # GIF 转换：解码 + 缩放部分可在 GPU 上执行，调色板始终在 CPU 上生成/应用
+                returncode = None
                 
-                if line:
-                    self.root.after(0, self.log_line, line)
+                # 有可用的 CUDA 时在 GPU 上解码和缩放，下载后再交给调色板滤镜
+                if await asyncio.to_thread(_probe_cuda_scale, self.ffmpeg_path):
+                    self.log("⚡ 使用 CUDA 硬件解码与缩放")
+                    returncode = await self._convert_gif(
+                        start_seek, end_to,
+                        ["-hwaccel", "cuda", "-hwaccel_output_format", "cuda"],
+                        "scale_cuda=240:-2,hwdownload,format=nv12,fps=8",
+                        effective_duration
+                    )
+                    if returncode != 0:
+                        # 部分编码格式不支持 NVDEC 等情况下回退到 CPU
+                        self.log("⚠️ 硬件加速转换失败，改用 CPU 重新转换")
+                        self._conversion_progress = 0
+                        returncode = None
                 
-                match = re.search(time_pattern, line)
-                if match and effective_duration > 0:
-                    hours = int(match.group(1))
-                    minutes = int(match.group(2))
-                    seconds = float(match.group(3))
-                    
-                    current_time = hours * 3600 + minutes * 60 + seconds
-                    progress = min((current_time / effective_duration) * 100, 100)
-                    
-                    if abs(progress - last_progress) > 0.5:
-                        last_progress = progress
-                        self.root.after(0, self.update_conversion_progress, progress)
+                if returncode is None:
+                    returncode = await self._convert_gif(
+                        start_seek, end_to, [],
+                        self._scale_chain(8, 240),
+                        effective_duration
+                    )
             
-            process.wait()
+            if returncode != 0:
+                self.root.after(0, self.conversion_failed, f"FFmpeg 返回错误代码: {returncode}")
+                return
             
-            if process.returncode == 0 and os.path.exists(self.output_file):
-                self.root.after(0, self.conversion_complete)
-            else:
-                self.root.after(0, self.conversion_failed, f"FFmpeg 返回错误代码: {process.returncode}")
+            # FFmpeg 正常退出但没有生成文件时仍视为失败
+            try:
+                os.stat(self.output_file)
+            except OSError:
+                self.root.after(0, self.conversion_failed, "FFmpeg 未生成输出文件")
+                return
+            
+            self.root.after(0, self.conversion_complete)
                 
         except Exception as e:
             self.root.after(0, self.conversion_failed, str(e))
     
+    def _scale_chain(self, target_fps, target_width):
+        """按输入视频生成帧率/缩放滤镜链，省略对当前视频无效的阶段
+        
+        源帧率不高于目标帧率时不加 fps，源宽度不大于目标宽度时不加 scale；
+        没有 ffprobe 信息时保留完整滤镜链
+        
+        Args:
+            target_fps: 输出帧率
+            target_width: 输出宽度
+        
+        Returns:
+            str: 滤镜链，两者都不需要时为 "null"
+        """
+        filters = []
+        if self.video_info.get("fps", target_fps + 1) > target_fps:
+            filters.append(f"fps={target_fps}")
+        if self.video_info.get("width", target_width + 1) > target_width:
+            filters.append(f"scale={target_width}:-1:flags=lanczos")
+        return ",".join(filters) or "null"
+    
+    async def _convert_gif(self, start_seek, end_to, input_args, scale_chain, effective_duration):
+        """执行 GIF 转换
+        
+        短片段在同一个滤镜图中 split 后生成并应用调色板；长片段分两遍：
+        第一遍生成调色板 PNG，第二遍读取调色板并应用，进度各占一半。
+        palettegen 只在输入结束时输出一帧，第一遍另外 split 出一路到空输出，
+        让 -progress 的 out_time 随解码推进
+        
+        Args:
+            start_seek: 开始时间（秒）
+            end_to: 结束时间（秒）
+            input_args: 放在 -i 之前的输入参数（如硬件解码选项）
+            scale_chain: 帧率与缩放滤镜链
+            effective_duration: 裁剪后的有效时长（秒）
+        
+        Returns:
+            FFmpeg 的退出码
+        """
+        palette_gen = "palettegen=max_colors=16"
+        palette_use = "paletteuse=dither=bayer:bayer_scale=3"
+        
+        if effective_duration < self.TWO_PASS_MIN_DURATION:
+            cmd = self._build_gif_cmd(
+                start_seek, end_to, input_args,
+                f"[0:v]{scale_chain},split[s0][s1];[s0]{palette_gen}[p];[s1][p]{palette_use}",
+                self.output_file
+            )
+            return await self._run_ffmpeg(cmd, effective_duration)
+        
+        # 调色板写入临时文件，不在用户的视频目录中创建或覆盖文件
+        with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as f:
+            palette_path = f.name
+        
+        try:
+            # 第一遍：生成调色板，[n] 送往空输出以获得进度
+            cmd = self._build_gif_cmd(
+                start_seek, end_to, input_args,
+                f"[0:v]{scale_chain},split[s][n];[s]{palette_gen}[p]",
+                "-",
+                output_args=["-map", "[p]", "-update", "1", palette_path,
+                             "-map", "[n]", "-f", "null"]
+            )
+            returncode = await self._run_ffmpeg(cmd, effective_duration, (0, 50))
+            if returncode != 0:
+                return returncode
+            
+            # 第二遍：应用调色板（-ss/-to 只作用于第一个输入）
+            cmd = self._build_gif_cmd(
+                start_seek, end_to, input_args,
+                f"[0:v]{scale_chain}[x];[x][1:v]{palette_use}",
+                self.output_file,
+                extra_inputs=["-i", palette_path]
+            )
+            return await self._run_ffmpeg(cmd, effective_duration, (50, 100))
+        finally:
+            try:
+                os.remove(palette_path)
+            except OSError:
+                pass
+    
+    def _build_gif_cmd(self, start_seek, end_to, input_args, filter_graph, output,
+                       extra_inputs=(), output_args=()):
+        """构建 GIF 转换的 FFmpeg 命令
+        
+        Args:
+            start_seek: 开始时间（秒）
+            end_to: 结束时间（秒）
+            input_args: 放在 -i 之前的输入参数（如硬件解码选项）
+            filter_graph: -filter_complex 滤镜图
+            output: 输出文件路径
+            extra_inputs: 视频之后的额外输入（如调色板图片）
+            output_args: 额外的输出参数
+        
+        Returns:
+            list: FFmpeg 命令行参数列表
+        """
+        return [
+            self.ffmpeg_path,
+            "-hide_banner",
+            "-loglevel", "warning",
+            "-filter_threads", self.ffmpeg_threads,
+            "-filter_complex_threads", self.ffmpeg_threads,
+            *input_args,
+            "-ss", str(start_seek),
+            "-to", str(end_to),
+            "-i", self.input_file,
+            *extra_inputs,
+            "-filter_complex", filter_graph,
+            *output_args,
+            "-threads", self.ffmpeg_threads,
+            "-progress", "pipe:1",
+            "-nostats",
+            *self._stats_args,
+            "-y",
+            output
+        ]
+    
+    async def _run_ffmpeg(self, cmd, effective_duration, progress_range=(0, 100)):
+        """启动 FFmpeg 并同时读取 stdout（进度）和 stderr（日志）
+        
+        Args:
+            cmd: FFmpeg 命令行参数列表
+            effective_duration: 裁剪后的有效时长（秒），用于计算进度
+            progress_range: 本次运行对应的总进度区间（%），多遍转换时各占一段
+        
+        Returns:
+            FFmpeg 的退出码
+        """
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            limit=PIPE_BUFSIZE,
+            **_POPEN_KW
+        )
+        
+        # 退出等待与两个管道读取在同一次 gather 中进行，由事件循环的子进程监视器唤醒，
+        # 不阻塞线程也不轮询
+        _, _, returncode = await asyncio.gather(
+            self._pump_progress(process.stdout, effective_duration, progress_range),
+            self._pump_log(process.stderr),
+            process.wait()
+        )
+        return returncode
+    
+    async def _pump_progress(self, stream, effective_duration, progress_range):
+        """读取 -progress 输出的 key=value 行并更新进度
+        
+        Args:
+            stream: FFmpeg 进程的 stdout StreamReader
+            effective_duration: 裁剪后的有效时长（秒）
+            progress_range: 映射到的总进度区间（%）
+        """
+        if effective_duration <= 0:
+            # 没有时长无法计算进度，仍需读空管道
+            async for _ in self._read_lines(stream):
+                pass
+            return
+        
+        # 微秒 → 0.5% 档位的换算系数，循环中只做一次乘法
+        inv = 200.0 / (effective_duration * 1_000_000)
+        last_tick = -1
+        progress_start, progress_end = progress_range
+        tick_scale = 0.005 * (progress_end - progress_start)
+        
+        async for line in self._read_lines(stream):
+            # 大部分行（frame=、fps=、bitrate= 等）与进度无关，先用前缀排除
+            if not line.startswith(b'out_time_'):
+                continue
+            
+            key, _, value = line.strip().partition(b'=')
+            # 旧版 FFmpeg 只有 out_time_ms（单位同样是微秒）
+            if key not in (b'out_time_us', b'out_time_ms'):
+                continue
+            
+            try:
+                tick = min(int(int(value) * inv), 200)
+            except ValueError:
+                continue  # 开始阶段可能是 N/A
+            
+            # 只记录最新值，由 Tk 定时器 _drain_updates 统一刷新进度条
+            if tick != last_tick:
+                last_tick = tick
+                self._conversion_progress = progress_start + tick * tick_scale
+    
+    async def _pump_log(self, stream):
+        """读取 FFmpeg stderr 并输出到日志（-loglevel warning 下只有警告和错误）
+        
+        Args:
+            stream: FFmpeg 进程的 stderr StreamReader
+        """
+        # 每块完整行只解码一次，再整体切分
+        async for block in self._read_blocks(stream):
+            self.log_lines(block.decode('utf-8', errors='ignore'))
+    
+    @classmethod
+    async def _read_lines(cls, stream):
+        """按 PIPE_CHUNK 大块读取管道，再切分为行（二进制，不含换行符）
+        
+        Args:
+            stream: FFmpeg 进程的 StreamReader
+        """
+        async for block in cls._read_blocks(stream):
+            for line in block.split(b'\n'):
+                yield line
+    
+    @staticmethod
+    async def _read_blocks(stream):
+        """按 PIPE_CHUNK 大块读取管道，每次产出到最后一个换行符为止的完整行（二进制）
+        
+        Args:
+            stream: FFmpeg 进程的 StreamReader
+        """
+        buf = b''
+        while True:
+            chunk = await stream.read(PIPE_CHUNK)
+            if not chunk:
+                break
+            buf += chunk
+            end = buf.rfind(b'\n')
+            if end >= 0:
+                yield buf[:end]
+                buf = buf[end + 1:]
+        if buf:
+            yield buf
+    
     def update_conversion_progress(self, progress):
         """更新转换进度"""
         self.conversion_progress_bar.set(progress / 100)
-        self.conversion_progress_label.configure(text=f"{progress:.1f}%")
-        self.root.update_idletasks()
+        self._progress_var.set(f"{progress:.1f}%")
+        self._shown_progress = progress
     
     def conversion_complete(self):
         """转换完成"""
+        self._conversion_progress = 100
         self.update_conversion_progress(100)
         self.log("✅ 转换完成！")
         self.is_converting = False
@@ -1216,8 +1998,19 @@ class ModernGifConverter:
         )
         
         if result:
-            output_dir = os.path.dirname(self.output_file)
-            os.startfile(output_dir)
+            if os.name == 'nt':
+                # 打开所在文件夹并选中生成的文件；Popen 不等待资源管理器启动完成
+                subprocess.Popen(
+                    ["explorer", "/select,", os.path.normpath(self.output_file)],
+                    creationflags=_CREATIONFLAGS
+                )
+            else:
+                # os.startfile 只存在于 Windows，其他平台交给系统的打开命令
+                opener = "open" if sys.platform == "darwin" else "xdg-open"
+                try:
+                    subprocess.Popen([opener, os.path.dirname(self.output_file)])
+                except OSError:
+                    self.log(f"⚠️ 无法打开文件夹: {os.path.dirname(self.output_file)}")
     
     def conversion_failed(self, error_msg):
         """转换失败"""
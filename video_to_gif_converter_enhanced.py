@@ -9,11 +9,15 @@ GIF Converter - Enhanced Version
 import os
 import sys
 import re
+import asyncio
 import subprocess
+import shutil
 import threading
+import tempfile
+import collections
+import functools
 import customtkinter as ctk
 from tkinter import filedialog, messagebox
-from pathlib import Path
 
 try:
     from tkVideoPlayer import TkinterVideo
@@ -24,6 +28,29 @@ except ImportError:
     print("请运行: pip install tkvideoplayer")
 
 
+# 解析 `ffmpeg -i` 输出中的视频时长
+_DURATION_RE = re.compile(rb"Duration:\s*(\d{2}):(\d{2}):(\d{2}\.\d{2})")
+
+# FFmpeg 管道 StreamReader 的缓冲上限和单次读取大小（默认 64 KB，加大以减少 read 系统调用）
+PIPE_BUFSIZE = 1 << 20
+
+# GIF 两遍转换的滤镜图：第一遍生成调色板，第二遍应用调色板（第二个输入为调色板 PNG）
+# palettegen 只在输入结束时输出一帧，第一遍另外 split 出 [n] 送往空输出，使 -progress 随解码推进
+_GIF_SCALE_CHAIN = "fps=8,scale=240:-1:flags=lanczos"
+_GIF_PALETTEGEN_FILTER = f"{_GIF_SCALE_CHAIN},split[s][n];[s]palettegen=max_colors=16[p]"
+_GIF_PALETTEUSE_FILTER = f"{_GIF_SCALE_CHAIN}[v];[v][1:v]paletteuse=dither=bayer:bayer_scale=3"
+
+# FFmpeg 的日志行可能以 \r 或 \n 结尾
+_NEWLINE_RE = re.compile(rb"[\r\n]")
+
+
+@functools.lru_cache(maxsize=4096)
+def _format_time(seconds):
+    """格式化整数秒为 MM:SS（按秒缓存结果）"""
+    mins, secs = divmod(seconds, 60)
+    return f"{mins:02d}:{secs:02d}"
+
+
 class ModernGifConverter:
     """现代化 GIF 转换器主类（带视频预览）"""
     
@@ -51,14 +78,23 @@ class ModernGifConverter:
         self.input_file = None
         self.output_file = None
         self.total_duration = 0
+        self._total_duration_str = "00:00"  # 总时长的显示文本，时长变化时更新
         self.is_playing = False
         self.video_player = None
+        # 待写入文本框的日志（UTF-8 字节）；deque 的 append/popleft 本身线程安全，无需加锁
+        self._log_queue = collections.deque()
+        self.max_log_lines = 500
+        self._log_ring = collections.deque(maxlen=self.max_log_lines)  # 最近的日志行，用于重建文本框
+        self._conversion_progress = None  # 转换线程写入的最新进度（%），由定时器读取
         
         # 创建 GUI
         self.create_widgets()
+        self.root.after(50, self._drain_log)
         
         # 检测 FFmpeg（在 GUI 创建后）
         self.ffmpeg_path = self.detect_ffmpeg()
+        self.ffprobe_path = self.detect_ffprobe()
+        self.hwaccels = self.detect_hwaccels()
         
         # 启动进度更新循环
         if VIDEO_PLAYER_AVAILABLE:
@@ -103,6 +139,56 @@ class ModernGifConverter:
         messagebox.showerror("FFmpeg 未找到", error_msg)
         return None
     
+    def detect_ffprobe(self):
+        """检测 ffprobe（可选，用于快速获取视频时长）
+        
+        Returns:
+            str: ffprobe 的路径，未找到时返回 None
+        """
+        if getattr(sys, 'frozen', False):
+            base_path = os.path.dirname(sys.executable)
+        else:
+            base_path = os.path.dirname(os.path.abspath(__file__))
+        
+        local_ffprobe = os.path.join(base_path, "ffprobe.exe")
+        if os.path.exists(local_ffprobe):
+            return local_ffprobe
+        
+        return shutil.which("ffprobe")
+    
+    def detect_hwaccels(self):
+        """查询 FFmpeg 支持的硬件解码方式（启动时探测一次）
+        
+        同时起到预热作用：ffmpeg 可执行文件及其 DLL 在启动时就被加载进系统文件缓存，
+        首次转换不再承担冷启动开销
+        
+        Returns:
+            list: 硬件解码方式名称，不支持或未找到 FFmpeg 时为空列表
+        """
+        if not self.ffmpeg_path:
+            return []
+        
+        if os.name == 'nt':
+            creationflags = subprocess.CREATE_NO_WINDOW
+        else:
+            creationflags = 0
+        
+        try:
+            result = subprocess.run(
+                [self.ffmpeg_path, "-hide_banner", "-hwaccels"],
+                capture_output=True,
+                text=True,
+                timeout=3,
+                creationflags=creationflags
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return []
+        
+        # 输出第一行是标题 "Hardware acceleration methods:"
+        if result.returncode != 0:
+            return []
+        return [line.strip() for line in result.stdout.splitlines()[1:] if line.strip()]
+    
     def validate_number(self, value):
         """验证输入是否为有效数字"""
         if value == "":
@@ -413,9 +499,6 @@ class ModernGifConverter:
             activate_scrollbars=True
         )
         self.log_text.pack(fill="both", expand=True)
-        
-        self.log_line_count = 0
-        self.max_log_lines = 500
     
     def select_file(self):
         """选择视频文件"""
@@ -438,11 +521,14 @@ class ModernGifConverter:
             self.convert_btn.configure(state="normal")
             self.log(f"✓ 已选择文件: {filename}")
             
+            self.total_duration = 0
+            
             # 加载视频到预览器
             if VIDEO_PLAYER_AVAILABLE and self.video_player:
                 self.load_video_preview(filename)
             
-            # 获取视频时长
+            # 获取视频时长（TkinterVideo.load() 不解析文件，video_info() 在 play() 之前
+            # 仍是上一个视频的信息，因此不能用作时长来源）
             self.get_video_duration(filename)
     
     def load_video_preview(self, video_path):
@@ -480,23 +566,26 @@ class ModernGifConverter:
     def start_progress_update(self):
         """启动进度更新循环"""
         def update():
-            if self.is_playing and self.video_player and self.total_duration > 0:
-                try:
-                    current = self.video_player.current_duration()
-                    self.progress_slider.set(current / self.total_duration)
-                    self.time_label.configure(
-                        text=f"{self.format_time(current)} / {self.format_time(self.total_duration)}"
-                    )
-                except:
-                    pass
-            self.root.after(100, update)
+            # 暂停或未加载视频时只低频检查，不查询播放器也不刷新控件
+            if not (self.is_playing and self.video_player and self.total_duration > 0):
+                self.root.after(250, update)
+                return
+            
+            try:
+                current = self.video_player.current_duration()
+                self.progress_slider.set(current / self.total_duration)
+                self.time_label.configure(
+                    text=f"{self.format_time(current)} / {self._total_duration_str}"
+                )
+            except:
+                pass
+            # 进度条刷新 200ms 一次即可，人眼察觉不到差别
+            self.root.after(200, update)
         update()
     
     def format_time(self, seconds):
         """格式化时间为 MM:SS"""
-        mins = int(seconds // 60)
-        secs = int(seconds % 60)
-        return f"{mins:02d}:{secs:02d}"
+        return _format_time(int(seconds))
     
     def set_start_point(self):
         """设置起点"""
@@ -526,72 +615,104 @@ class ModernGifConverter:
             self.log(f"⚠️ 设置终点失败: {str(e)}")
     
     def log(self, message):
-        """添加日志"""
-        self.log_text.insert("end", message + "\n")
-        self.log_line_count += 1
-        
-        if self.log_line_count > self.max_log_lines:
-            self.log_text.delete("1.0", "101.0")
-            self.log_line_count -= 100
-        
-        self.log_text.see("end")
-        self.root.update_idletasks()
+        """添加日志（可在任意线程调用，与 FFmpeg 输出一起由 _drain_log 批量写入文本框）"""
+        self._log_queue.append(message.encode('utf-8'))
     
     def log_line(self, line):
-        """添加单行日志"""
+        """添加单行日志（转换线程调用，由 _drain_log 批量解码并写入文本框）
+        
+        Args:
+            line: FFmpeg 输出的一行（bytes，未解码）
+        """
         if not line.strip():
             return
         
-        self.log_text.insert("end", line + "\n")
-        self.log_line_count += 1
+        self._log_queue.append(line)
+    
+    def _drain_log(self):
+        """定时把累积的日志批量写入文本框，并刷新转换进度（Tk 线程）"""
+        progress = self._conversion_progress
+        if progress is not None:
+            self._conversion_progress = None
+            self.update_conversion_progress(progress)
         
-        if self.log_line_count > self.max_log_lines:
-            self.log_text.delete("1.0", "101.0")
-            self.log_line_count -= 100
+        batch = []
+        while self._log_queue:
+            batch.append(self._log_queue.popleft())
         
-        self.log_text.see("end")
+        if batch:
+            # 整批只解码一次
+            text = b"\n".join(batch).decode('utf-8', errors='ignore')
+            self._log_ring.extend(text.split("\n"))
+            
+            # 文本框超过 2 倍上限时用环形缓冲一次性重建，其余时候只追加
+            line_count = int(self.log_text.index("end-1c").split(".")[0]) - 1
+            if line_count + len(batch) > 2 * self.max_log_lines:
+                self.log_text.delete("1.0", "end")
+                self.log_text.insert("end", "\n".join(self._log_ring) + "\n")
+            else:
+                self.log_text.insert("end", text + "\n")
+            
+            self.log_text.see("end")
+        
+        self.root.after(50, self._drain_log)
     
     def get_video_duration(self, video_path):
-        """获取视频时长"""
+        """获取视频时长（优先使用 ffprobe，没有时解析 ffmpeg -i 的输出）"""
         if not self.ffmpeg_path:
             return None
         
         try:
-            cmd = [self.ffmpeg_path, "-i", video_path]
-            
             if os.name == 'nt':
                 creationflags = subprocess.CREATE_NO_WINDOW
             else:
                 creationflags = 0
             
-            result = subprocess.run(
-                cmd,
-                stderr=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                text=True,
-                encoding='utf-8',
-                errors='ignore',
-                creationflags=creationflags
-            )
+            total_seconds = None
             
-            duration_pattern = r"Duration:\s*(\d{2}):(\d{2}):(\d{2}\.\d{2})"
-            match = re.search(duration_pattern, result.stderr)
+            if self.ffprobe_path:
+                result = subprocess.run(
+                    [
+                        self.ffprobe_path,
+                        "-v", "error",
+                        "-show_entries", "format=duration",
+                        "-of", "default=nw=1:nk=1",
+                        video_path
+                    ],
+                    stderr=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    text=True,
+                    encoding='utf-8',
+                    errors='ignore',
+                    creationflags=creationflags
+                )
+                try:
+                    total_seconds = float(result.stdout.strip())
+                except ValueError:
+                    total_seconds = None  # 时长为 N/A 时回退到 ffmpeg -i
             
-            if match:
-                hours = int(match.group(1))
-                minutes = int(match.group(2))
-                seconds = float(match.group(3))
+            if total_seconds is None:
+                cmd = [self.ffmpeg_path, "-hide_banner", "-i", video_path]
                 
-                total_seconds = hours * 3600 + minutes * 60 + seconds
-                self.total_duration = total_seconds
-                self.log(f"⏱️ 视频时长: {hours:02d}:{minutes:02d}:{seconds:05.2f} ({total_seconds:.2f} 秒)")
+                # 以字节读取，正则直接匹配字节，不解码整段输出
+                result = subprocess.run(
+                    cmd,
+                    stderr=subprocess.PIPE,
+                    stdout=subprocess.DEVNULL,
+                    creationflags=creationflags
+                )
                 
-                # 更新时间显示
-                if VIDEO_PLAYER_AVAILABLE and hasattr(self, 'time_label'):
-                    self.time_label.configure(
-                        text=f"00:00 / {self.format_time(total_seconds)}"
-                    )
+                match = _DURATION_RE.search(result.stderr)
                 
+                if match:
+                    total_seconds = (
+                        int(match.group(1)) * 3600
+                        + int(match.group(2)) * 60
+                        + float(match.group(3))
+                    )
+            
+            if total_seconds is not None:
+                self.set_duration(total_seconds)
                 return total_seconds
             else:
                 self.log("⚠️ 警告: 无法解析视频时长")
@@ -601,6 +722,21 @@ class ModernGifConverter:
             self.log(f"❌ 获取视频时长时出错: {str(e)}")
             return None
     
+    def set_duration(self, total_seconds):
+        """记录视频时长并更新时间显示"""
+        hours, rem = divmod(total_seconds, 3600)
+        minutes, seconds = divmod(rem, 60)
+        
+        self.total_duration = total_seconds
+        self._total_duration_str = self.format_time(total_seconds)
+        self.log(f"⏱️ 视频时长: {int(hours):02d}:{int(minutes):02d}:{seconds:05.2f} ({total_seconds:.2f} 秒)")
+        
+        # 更新时间显示
+        if VIDEO_PLAYER_AVAILABLE and hasattr(self, 'time_label'):
+            self.time_label.configure(
+                text=f"00:00 / {self._total_duration_str}"
+            )
+    
     def start_conversion(self):
         """开始转换"""
         if not self.ffmpeg_path:
@@ -616,8 +752,8 @@ class ModernGifConverter:
             self.toggle_play_pause()
         
         # 生成输出文件名
-        input_path = Path(self.input_file)
-        self.output_file = str(input_path.parent / f"{input_path.stem}.gif")
+        stem, _ = os.path.splitext(self.input_file)
+        self.output_file = stem + ".gif"
         
         # 禁用控制
         self.convert_btn.configure(state="disabled")
@@ -633,8 +769,10 @@ class ModernGifConverter:
         self.conversion_progress_label.configure(text="0%")
         
         # 清空日志
+        self._log_queue.clear()
+        self._conversion_progress = None
+        self._log_ring.clear()
         self.log_text.delete("1.0", "end")
-        self.log_line_count = 0
         
         # 启动转换线程
         thread = threading.Thread(target=self.convert_video, daemon=True)
@@ -690,66 +828,159 @@ class ModernGifConverter:
             self.log(f"✂️ 裁剪设置: 开始={start_seek:.2f}秒, 结束={end_to:.2f}秒, 有效时长={effective_duration:.2f}秒")
             self.log("🎬 开始转换...")
             
-            # FFmpeg 命令
-            cmd = [
-                self.ffmpeg_path,
-                "-ss", str(start_seek),
-                "-to", str(end_to),
-                "-i", self.input_file,
-                "-vf", "fps=8,scale=240:-1:flags=lanczos,split[s0][s1];[s0]palettegen=max_colors=16[p];[s1][p]paletteuse=dither=bayer:bayer_scale=3",
-                "-y",
-                self.output_file
-            ]
+            # 两遍转换：先生成调色板 PNG，再读取调色板生成 GIF，避免 split 缓冲整段视频
+            with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as f:
+                palette_path = f.name
             
-            if os.name == 'nt':
-                creationflags = subprocess.CREATE_NO_WINDOW
-            else:
-                creationflags = 0
-            
-            process = subprocess.Popen(
-                cmd,
-                stderr=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stdin=subprocess.PIPE,
-                universal_newlines=True,
-                bufsize=1,
-                encoding='utf-8',
-                errors='ignore',
-                creationflags=creationflags
-            )
-            
-            time_pattern = r"time=(\d{2}):(\d{2}):(\d{2}\.\d{2})"
-            last_progress = -1
-            
-            for line in process.stderr:
-                line = line.strip()
-                
-                if line:
-                    self.root.after(0, self.log_line, line)
+            try:
+                # 第一遍：生成调色板（进度 0-50%，由空输出提供）
+                cmd = self._build_cmd(
+                    start_seek, effective_duration,
+                    ["-lavfi", _GIF_PALETTEGEN_FILTER,
+                     "-map", "[p]", "-update", "1", palette_path,
+                     "-map", "[n]", "-f", "null"],
+                    "-"
+                )
+                returncode = self._run_ffmpeg(cmd, effective_duration, 0)
                 
-                match = re.search(time_pattern, line)
-                if match and effective_duration > 0:
-                    hours = int(match.group(1))
-                    minutes = int(match.group(2))
-                    seconds = float(match.group(3))
-                    
-                    current_time = hours * 3600 + minutes * 60 + seconds
-                    progress = min((current_time / effective_duration) * 100, 100)
-                    
-                    if abs(progress - last_progress) > 0.5:
-                        last_progress = progress
-                        self.root.after(0, self.update_conversion_progress, progress)
-            
-            process.wait()
+                # 第二遍：应用调色板（进度 50-100%）
+                if returncode == 0:
+                    cmd = self._build_cmd(
+                        start_seek, effective_duration,
+                        ["-i", palette_path, "-lavfi", _GIF_PALETTEUSE_FILTER],
+                        self.output_file
+                    )
+                    returncode = self._run_ffmpeg(cmd, effective_duration, 50)
+            finally:
+                try:
+                    os.remove(palette_path)
+                except OSError:
+                    pass
             
-            if process.returncode == 0 and os.path.exists(self.output_file):
+            if returncode == 0 and os.path.exists(self.output_file):
                 self.root.after(0, self.conversion_complete)
             else:
-                self.root.after(0, self.conversion_failed, f"FFmpeg 返回错误代码: {process.returncode}")
+                self.root.after(0, self.conversion_failed, f"FFmpeg 返回错误代码: {returncode}")
                 
         except Exception as e:
             self.root.after(0, self.conversion_failed, str(e))
     
+    def _build_cmd(self, start, duration, args, dst):
+        """构建一遍 FFmpeg 转换命令
+        
+        -ss/-t 作为输入参数，由解复用器直接定位到起点附近的关键帧，而不是从头解码；
+        有硬件解码能力时由 FFmpeg 自动选择（帧会自动下载到内存，滤镜不变；失败时回退软件解码）
+        
+        Args:
+            start: 开始时间（秒）
+            duration: 转换时长（秒）
+            args: 视频输入之后的参数（额外输入、滤镜等）
+            dst: 输出文件路径
+        
+        Returns:
+            list: FFmpeg 命令行参数列表
+        """
+        hwaccel_args = ["-hwaccel", "auto"] if self.hwaccels else []
+        return [
+            self.ffmpeg_path,
+            "-hide_banner",
+            "-ss", str(start),
+            "-t", str(duration),
+            *hwaccel_args,
+            "-i", self.input_file,
+            *args,
+            "-threads", "0",
+            "-progress", "pipe:1",
+            "-nostats",
+            "-y",
+            dst
+        ]
+    
+    def _run_ffmpeg(self, cmd, effective_duration, progress_offset):
+        """运行一遍 FFmpeg（后台线程），在本线程的事件循环中同时读取进度和日志
+        
+        Args:
+            cmd: FFmpeg 命令行参数列表
+            effective_duration: 裁剪后的有效时长（秒）
+            progress_offset: 本遍在总进度中的起点（%），每遍占 50%
+        
+        Returns:
+            FFmpeg 的退出码
+        """
+        return asyncio.run(self._run_ffmpeg_async(cmd, effective_duration, progress_offset))
+    
+    async def _run_ffmpeg_async(self, cmd, effective_duration, progress_offset):
+        """启动 FFmpeg：stdout 读取 -progress 进度，stderr 读取日志，两者与退出等待并发进行"""
+        if os.name == 'nt':
+            creationflags = subprocess.CREATE_NO_WINDOW
+        else:
+            creationflags = 0
+        
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stderr=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stdin=asyncio.subprocess.PIPE,
+            limit=PIPE_BUFSIZE,
+            creationflags=creationflags
+        )
+        
+        _, _, returncode = await asyncio.gather(
+            self._pump_progress(process.stdout, effective_duration, progress_offset),
+            self._pump_log(process.stderr),
+            process.wait()
+        )
+        return returncode
+    
+    async def _pump_progress(self, stream, effective_duration, progress_offset):
+        """读取 -progress 输出的 key=value 行并记录最新进度
+        
+        Args:
+            stream: FFmpeg 进程的 stdout StreamReader
+            effective_duration: 裁剪后的有效时长（秒）
+            progress_offset: 本遍在总进度中的起点（%）
+        """
+        last_progress = -1
+        
+        # out_time_us 为已处理时间（微秒），旧版只有 out_time_ms（同为微秒）
+        async for line in stream:
+            # frame=、fps=、bitrate= 等行与进度无关，先用前缀排除再切分
+            if not line.startswith(b"out_time_"):
+                continue
+            
+            key, _, value = line.strip().partition(b"=")
+            if key not in (b"out_time_us", b"out_time_ms") or effective_duration <= 0:
+                continue
+            
+            try:
+                current_time = int(value) / 1_000_000
+            except ValueError:
+                continue  # 开始阶段可能是 N/A
+            
+            progress = progress_offset + min((current_time / effective_duration) * 50, 50)
+            
+            if abs(progress - last_progress) > 0.5:
+                last_progress = progress
+                self._conversion_progress = progress
+    
+    async def _pump_log(self, stream):
+        """读取 FFmpeg stderr 并加入日志队列
+        
+        Args:
+            stream: FFmpeg 进程的 stderr StreamReader
+        """
+        buf = b''
+        while True:
+            chunk = await stream.read(PIPE_BUFSIZE)
+            if not chunk:
+                break
+            buf += chunk
+            *lines, buf = _NEWLINE_RE.split(buf)
+            for line in lines:
+                self.log_line(line.strip())
+        
+        self.log_line(buf.strip())
+    
     def update_conversion_progress(self, progress):
         """更新转换进度"""
         self.conversion_progress_bar.set(progress / 100)
@@ -758,6 +989,7 @@ class ModernGifConverter:
     
     def conversion_complete(self):
         """转换完成"""
+        self._conversion_progress = None  # 丢弃尚未刷新的中间进度
         self.update_conversion_progress(100)
         self.log("✅ 转换完成！")
         self.is_converting = False